@@ -4,9 +4,10 @@
 分析CSV中的任务引用关系，生成统计报告
 """
 
+import heapq
 from pathlib import Path
 from collections import defaultdict
-from utils.csv_parser import parse_feishu_tasks_csv
+from utils.csv_parser import ParsedNode, parse_feishu_tasks_csv
 
 
 def analyze_citations(csv_path: Path):
@@ -18,6 +19,14 @@ def analyze_citations(csv_path: Path):
     # 解析CSV
     parsed = parse_feishu_tasks_csv(csv_path)
 
+    # 标题 -> 节点索引（重名时保留第一个，与逐个查找的语义一致）
+    title_to_node: dict[str, ParsedNode] = {}
+    for n in parsed.nodes:
+        title_to_node.setdefault(n.title, n)
+    first_executor = {
+        t: (n.executors[0] if n.executors else "未分配") for t, n in title_to_node.items()
+    }
+
     # 基本统计
     print(f"\n【基本统计】")
     print(f"  总任务数: {len(parsed.nodes)}")
@@ -46,48 +55,72 @@ def analyze_citations(csv_path: Path):
 
     # 被引用次数排行
     print(f"\n【被引用次数 TOP 10】")
-    citation_counts = sorted(
-        [(parent, len(children)) for parent, children in parent_to_children.items()],
+    top_cited = heapq.nlargest(
+        10,
+        ((parent, len(children)) for parent, children in parent_to_children.items()),
         key=lambda x: x[1],
-        reverse=True
     )
-    for i, (task, count) in enumerate(citation_counts[:10], 1):
-        # 找到对应节点的执行人
-        node = next((n for n in parsed.nodes if n.title == task), None)
-        executor = list(node.executors)[0] if node and node.executors else "未分配"
+    for i, (task, count) in enumerate(top_cited, 1):
+        executor = first_executor.get(task, "未分配")
         print(f"  {i:2d}. {task[:40]:40s} → 被引用{count}次 (👤{executor})")
 
     # 按执行人统计任务数
     user_task_counts = defaultdict(int)
     for node in parsed.nodes:
         if node.executors:
-            executor = list(node.executors)[0]  # 只取第一个执行人
+            executor = node.executors[0]  # 只取第一个执行人
             user_task_counts[executor] += 1
         else:
             user_task_counts["未分配"] += 1
 
     print(f"\n【执行人任务数 TOP 10】")
-    sorted_users = sorted(user_task_counts.items(), key=lambda x: x[1], reverse=True)
-    for i, (user, count) in enumerate(sorted_users[:10], 1):
+    top_users = heapq.nlargest(10, user_task_counts.items(), key=lambda x: x[1])
+    for i, (user, count) in enumerate(top_users, 1):
         print(f"  {i:2d}. {user:20s} → {count:3d} 个任务")
 
     # 深度分析（找出最长引用链）
-    def get_depth(task_title, visited=None):
-        """递归计算任务的最大深度"""
-        if visited is None:
-            visited = set()
-        if task_title in visited:
-            return 0
-        visited.add(task_title)
-
-        node = next((n for n in parsed.nodes if n.title == task_title), None)
-        if not node or not node.parents:
-            return 0
-
-        max_parent_depth = max(
-            get_depth(parent, visited.copy()) for parent in node.parents
-        )
-        return max_parent_depth + 1
+    depth_cache: dict[str, int] = {}
+
+    def parents_of(task_title):
+        node = title_to_node.get(task_title)
+        return node.parents if node else ()
+
+    def get_depth(task_title):
+        """
+        计算任务的最大深度（迭代DFS，成环时回到当前路径上的父任务按0层计）
+
+        只有未碰到环的节点才写入缓存：其可达子图无环，深度与遍历路径无关；
+        碰到环的节点结果取决于当前路径，每次重新计算，与原递归实现一致。
+        """
+        if task_title in depth_cache:
+            return depth_cache[task_title]
+
+        on_path = {task_title}
+        # 栈帧: [标题, 父任务迭代器, 父任务最大深度, 是否未碰到环]
+        stack = [[task_title, iter(parents_of(task_title)), -1, True]]
+        while True:
+            frame = stack[-1]
+            for parent in frame[1]:
+                if parent in depth_cache:
+                    frame[2] = max(frame[2], depth_cache[parent])
+                elif parent in on_path:
+                    frame[2] = max(frame[2], 0)
+                    frame[3] = False
+                else:
+                    on_path.add(parent)
+                    stack.append([parent, iter(parents_of(parent)), -1, True])
+                    break
+            else:
+                title, _, max_parent_depth, clean = stack.pop()
+                on_path.discard(title)
+                depth = max_parent_depth + 1  # 无父任务时为0
+                if clean:
+                    depth_cache[title] = depth
+                if not stack:
+                    return depth
+                caller = stack[-1]
+                caller[2] = max(caller[2], depth)
+                caller[3] = caller[3] and clean
 
     print(f"\n【引用链深度分析】")
     task_depths = [(node.title, get_depth(node.title)) for node in parsed.nodes]
@@ -102,17 +135,16 @@ def analyze_citations(csv_path: Path):
         chain = [task]
         current = task
         for _ in range(max_depth):
-            node = next((n for n in parsed.nodes if n.title == current), None)
+            node = title_to_node.get(current)
             if node and node.parents:
-                parent = list(node.parents)[0]
+                parent = node.parents[0]
                 chain.append(parent)
                 current = parent
 
         print(f"\n    {task[:30]}...")
         for i, t in enumerate(chain):
             indent = "  " * i
-            node = next((n for n in parsed.nodes if n.title == t), None)
-            executor = list(node.executors)[0] if node and node.executors else "未分配"
+            executor = first_executor.get(t, "未分配")
             print(f"      {indent}└─ {t[:40]} (👤{executor})")
 
     print("\n" + "=" * 80)
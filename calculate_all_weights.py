@@ -5,12 +5,14 @@
 """
 
 import argparse
-import json
+import heapq
 from decimal import Decimal
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter
 from utils.csv_parser import parse_feishu_tasks_csv
+from utils.json_io import dump_json
 from core.revenue_calculator import RevenueNode, RevenueEdge, RevenueGraph
+from core.weight_calculator import DEFAULT_CREATIVITY_FACTOR, DEFAULT_PROPAGATION_RATE
 import datetime as dt
 
 
@@ -28,15 +30,16 @@ def calculate_user_weights(csv_path: Path, save_debug: bool = False):
 
     # Step 2: 构建节点映射
     print("\n[Step 2] 构建节点映射...")
+    incoming = Counter(c.to_title for c in parsed.citations)
     node_map = {}
     for node in parsed.nodes:
         node_map[node.title] = RevenueNode(
             id=node.title,
             creator_id=node.executors[0] if node.executors else "未分配",
             created_at=node.created_date or dt.date.today(),
-            citation_count=sum(1 for c in parsed.citations if c.to_title == node.title),
-            creativity_factor=Decimal("1.0"),
-            propagation_rate=Decimal("0.3"),
+            citation_count=incoming.get(node.title, 0),
+            creativity_factor=DEFAULT_CREATIVITY_FACTOR,
+            propagation_rate=DEFAULT_PROPAGATION_RATE,
         )
     print(f"  ✓ 创建了 {len(node_map)} 个节点")
 
@@ -53,50 +56,52 @@ def calculate_user_weights(csv_path: Path, save_debug: bool = False):
     print(f"  ✓ 创建了 {len(edges)} 条引用边")
 
     # Step 4: 计算每个用户的任务权重
+    # 权重 = 被引用次数 × 创造性系数 × 时间优先系数
+    # 结果最终都以float输出，这里整列用float计算，避免逐节点的Decimal运算
     print("\n[Step 4] 计算用户任务权重...")
-    user_stats = defaultdict(lambda: {
-        "task_count": 0,  # 任务数量
-        "direct_citations": 0,  # 作为执行人的任务被引用次数
-        "total_citation_weight": Decimal("0"),  # 总引用权重
-        "tasks": []  # 任务列表
-    })
-
-    for node in node_map.values():
-        user = node.creator_id
-        user_stats[user]["task_count"] += 1
-        user_stats[user]["direct_citations"] += node.citation_count
-
-        # 计算该节点的权重贡献
-        # 权重 = 被引用次数 × 创造性系数 × 时间优先系数
-        days_elapsed = (dt.date.today() - node.created_at).days
-        time_priority = 1 / (1 + days_elapsed / 365)
-        node_weight = Decimal(str(node.citation_count)) * node.creativity_factor * Decimal(str(time_priority))
-
-        user_stats[user]["total_citation_weight"] += node_weight
-        user_stats[user]["tasks"].append({
+    today = dt.date.today()
+    nodes = list(node_map.values())
+    time_priority_by_days: dict[int, float] = {}  # 创建日期重复很多，按天数缓存时间优先系数
+    node_weights = []
+    for node in nodes:
+        days_elapsed = (today - node.created_at).days
+        time_priority = time_priority_by_days.get(days_elapsed)
+        if time_priority is None:
+            time_priority = time_priority_by_days[days_elapsed] = 1 / (1 + days_elapsed / 365)
+        node_weights.append(node.citation_count * float(node.creativity_factor) * time_priority)
+
+    # 每个用户: [任务数量, 被引用次数合计, 总引用权重, 任务列表]
+    user_stats: dict[str, list] = {}
+    for node, node_weight in zip(nodes, node_weights):
+        stats = user_stats.get(node.creator_id)
+        if stats is None:
+            stats = user_stats[node.creator_id] = [0, 0, 0.0, []]
+        stats[0] += 1
+        stats[1] += node.citation_count
+        stats[2] += node_weight
+        stats[3].append({
             "title": node.id,
             "citations": node.citation_count,
-            "weight": float(node_weight)
+            "weight": node_weight
         })
 
     print(f"  ✓ 统计了 {len(user_stats)} 个用户")
 
     # Step 5: 计算标准化权重（占比）
     print("\n[Step 5] 计算标准化权重...")
-    total_weight = sum(stats["total_citation_weight"] for stats in user_stats.values())
+    total_weight = sum(stats[2] for stats in user_stats.values())
 
     user_weights = []
-    for user, stats in user_stats.items():
-        weight = stats["total_citation_weight"]
-        normalized_weight = float(weight / total_weight * 100) if total_weight > 0 else 0
+    for user, (task_count, direct_citations, weight, tasks) in user_stats.items():
+        normalized_weight = weight / total_weight * 100 if total_weight > 0 else 0
 
         user_weights.append({
             "user": user,
-            "task_count": stats["task_count"],
-            "total_citations": stats["direct_citations"],
-            "raw_weight": float(weight),
+            "task_count": task_count,
+            "total_citations": direct_citations,
+            "raw_weight": weight,
             "normalized_weight": normalized_weight,  # 百分比
-            "tasks": sorted(stats["tasks"], key=lambda x: x["weight"], reverse=True)[:5]  # 只保留前5个任务
+            "tasks": heapq.nlargest(5, tasks, key=lambda x: x["weight"])  # 只保留前5个任务
         })
 
     # 按权重排序
@@ -124,15 +129,14 @@ def calculate_user_weights(csv_path: Path, save_debug: bool = False):
             "total_users": len(user_weights),
             "total_tasks": sum(u["task_count"] for u in user_weights),
             "total_citations": sum(u["total_citations"] for u in user_weights),
-            "total_weight": float(total_weight)
+            "total_weight": total_weight
         },
         "user_weights": user_weights
     }
 
     output_path = Path("logs/user_weights.json")
     output_path.parent.mkdir(exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    dump_json(output_data, output_path)
 
     print(f"\n💾 详细结果已保存到: {output_path}")
 
@@ -1,29 +1,44 @@
 from __future__ import annotations
 
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
-from typing import Any, Iterable
+from typing import Iterable
 
-from core.weight_calculator import WeightCalculator, calculate_reference_weight
+from core.weight_calculator import WeightCalculator, _to_decimal, calculate_reference_weight_float
 
 
 _MONEY_QUANT = Decimal("0.01")
 
 
-def _to_decimal(value: Any, *, field: str) -> Decimal:
-    if isinstance(value, Decimal):
-        return value
-    if isinstance(value, int):
-        return Decimal(value)
-    if isinstance(value, str):
-        return Decimal(value)
-    if isinstance(value, float):
-        return Decimal(str(value))
-    raise TypeError(f"{field} must be Decimal|int|str|float, got {type(value).__name__}")
+def _split_cents(pool_cents: int, weights: list[float], total_weight: float) -> list[int]:
+    """
+    Split pool_cents proportionally to weights (total_weight = sum(weights) > 0).
+
+    Each share is floored, then the leftover cents go to the largest fractional
+    remainders; ties keep input order. The result always sums to pool_cents.
+    """
+    shares: list[int] = []
+    remainders: list[float] = []
+    for weight in weights:
+        raw = pool_cents * weight / total_weight
+        floored = int(raw)
+        shares.append(floored)
+        remainders.append(raw - floored)
+
+    remaining = pool_cents - sum(shares)
+    if remaining > 0:
+        order = sorted(range(len(shares)), key=lambda i: -remainders[i])
+        for i in range(remaining):
+            shares[order[i % len(order)]] += 1
+    return shares
 
 
 def _quantize_money(value: Decimal, *, rounding: str = ROUND_HALF_UP) -> Decimal:
+    # Values already at cent precision need no rounding, whatever the mode.
+    if value.as_tuple().exponent == -2:
+        return value
     return value.quantize(_MONEY_QUANT, rounding=rounding)
 
 
@@ -119,18 +134,31 @@ class RevenueGraph:
             lst.sort(key=lambda e: (e.to_node_id, str(e.weight)))
 
         self._nodes_by_id = nodes_by_id
-        self._upstream_by_node_id = upstream_by_node_id
+        self._upstream_by_node_id: dict[str, tuple[RevenueEdge, ...]] = {
+            nid: tuple(lst) for nid, lst in upstream_by_node_id.items()
+        }
         self._incoming_citation_count = incoming_citation_count
 
+        # Column view of the same edges for the propagation loop: upstream node ids and
+        # float edge weights as parallel tuples, so no RevenueEdge is touched per visit.
+        self._upstream_columns: dict[str, tuple[tuple[str, ...], tuple[float, ...]]] = {
+            nid: (tuple(e.to_node_id for e in lst), tuple(float(e.weight) for e in lst))
+            for nid, lst in self._upstream_by_node_id.items()
+        }
+
     def node(self, node_id: str) -> RevenueNode:
         return self._nodes_by_id[node_id]
 
     def upstream_edges(self, node_id: str) -> tuple[RevenueEdge, ...]:
-        return tuple(self._upstream_by_node_id.get(node_id, ()))
+        return self._upstream_by_node_id.get(node_id, ())
 
     def incoming_citation_count(self, node_id: str) -> int:
         return self._incoming_citation_count.get(node_id, 0)
 
+    def upstream_columns(self, node_id: str) -> tuple[tuple[str, ...], tuple[float, ...]]:
+        """Upstream node ids and float edge weights, in upstream_edges order."""
+        return self._upstream_columns.get(node_id, ((), ()))
+
 
 @dataclass(frozen=True)
 class RevenueCalculatorConfig:
@@ -164,26 +192,141 @@ class RevenueCalculator:
         self._now = now or dt.datetime.now(tz=dt.timezone.utc)
         self._config = config or RevenueCalculatorConfig()
         self._weight_calculator = weight_calculator or WeightCalculator(now=self._now)
+        self._propagation_rate_cache: dict[str, Decimal] = {}
+        self._node_weight_cache: dict[str, float] = {}
 
     def distribute(self, *, task_id: str, node_id: str, total_revenue: Decimal | int | str) -> tuple[RevenueAllocation, ...]:
         amount = _to_decimal(total_revenue, field="total_revenue")
         if amount < 0:
             raise ValueError("total_revenue must be >= 0")
         amount = _quantize_money(amount)
+        if amount < _MONEY_QUANT:
+            return ()
+
+        # Nothing upstream to propagate to: the whole amount stays with the node's creator.
+        if not self._graph.upstream_edges(node_id):
+            return (
+                RevenueAllocation(
+                    task_id=task_id,
+                    node_id=node_id,
+                    user_id=self._graph.node(node_id).creator_id,
+                    amount=amount,
+                    source="direct",
+                    propagation_level=0,
+                ),
+            )
 
         allocations: list[RevenueAllocation] = []
-        self._distribute_recursive(
-            task_id=task_id,
-            node_id=node_id,
-            amount=amount,
-            propagation_level=0,
-            path=set(),
-            out=allocations,
-        )
+        # Depth-first work stack of (node_id, amount, propagation_level, path). Upstream
+        # shares are pushed in reverse so allocations come out in node-id order per level.
+        work: list[tuple[str, Decimal, int, frozenset[str]]] = [(node_id, amount, 0, frozenset())]
+        while work:
+            current_id, current_amount, propagation_level, path = work.pop()
+            if current_amount < _MONEY_QUANT:
+                continue
+
+            node = self._graph.node(current_id)
+            source = "direct" if propagation_level == 0 else "propagation"
+
+            if current_id in path:
+                propagation_rate = Decimal("0")
+            elif propagation_level >= self._config.max_propagation_depth:
+                propagation_rate = Decimal("0")
+            else:
+                propagation_rate = self._effective_propagation_rate(node)
+
+            pool = _quantize_money(current_amount * propagation_rate, rounding=ROUND_DOWN)
+            if pool < self._config.min_propagation_amount:
+                pool = Decimal("0.00")
+            retention = current_amount - pool
+
+            if retention >= _MONEY_QUANT:
+                allocations.append(
+                    RevenueAllocation(
+                        task_id=task_id,
+                        node_id=node.id,
+                        user_id=node.creator_id,
+                        amount=retention,
+                        source=source,
+                        propagation_level=propagation_level,
+                    )
+                )
+
+            if pool < _MONEY_QUANT:
+                continue
+
+            cents_by_node = self._split_pool_cents(pool, current_id)
+            if cents_by_node is None:
+                allocations.append(
+                    RevenueAllocation(
+                        task_id=task_id,
+                        node_id=node.id,
+                        user_id=node.creator_id,
+                        amount=pool,
+                        source=source,
+                        propagation_level=propagation_level,
+                    )
+                )
+                continue
+
+            upstream_path = path | {current_id}
+            for upstream_id, cents in sorted(cents_by_node.items(), key=lambda item: item[0], reverse=True):
+                if cents <= 0:
+                    continue
+                work.append((upstream_id, Decimal(cents).scaleb(-2), propagation_level + 1, upstream_path))
 
         return tuple(a for a in allocations if a.amount >= _MONEY_QUANT)
 
+    def distribute_many(
+        self,
+        inputs: Iterable[tuple[str, str, Decimal | int | str]],
+        *,
+        max_workers: int | None = None,
+    ) -> list[tuple[RevenueAllocation, ...]]:
+        """
+        Run distribute for each (task_id, node_id, total_revenue) input, returning results in input order.
+
+        Runs inline by default. Passing max_workers > 1 spreads the batch over a process pool
+        (the calculator is sent to each worker once); pool startup and pickling usually cost more
+        than the distributions themselves, so only opt in for large, expensive batches.
+        """
+        items = list(inputs)
+        workers = max_workers or 1
+        if workers <= 1:
+            return [
+                self.distribute(task_id=task_id, node_id=node_id, total_revenue=total_revenue)
+                for task_id, node_id, total_revenue in items
+            ]
+
+        chunksize = max(1, len(items) // (4 * workers))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_distribute_worker,
+            initargs=(self,),
+        ) as executor:
+            return list(executor.map(_distribute_worker, items, chunksize=chunksize))
+
+    def _node_weight(self, node_id: str) -> float:
+        weight = self._node_weight_cache.get(node_id)
+        if weight is None:
+            node = self._graph.node(node_id)
+            weight = calculate_reference_weight_float(
+                created_at=node.created_at,
+                now=self._weight_calculator.now,
+                citation_count=max(node.citation_count, self._graph.incoming_citation_count(node_id)),
+                creativity_factor=float(node.creativity_factor),
+            )
+            self._node_weight_cache[node_id] = weight
+        return weight
+
     def _effective_propagation_rate(self, node: RevenueNode) -> Decimal:
+        rate = self._propagation_rate_cache.get(node.id)
+        if rate is None:
+            rate = self._compute_effective_propagation_rate(node)
+            self._propagation_rate_cache[node.id] = rate
+        return rate
+
+    def _compute_effective_propagation_rate(self, node: RevenueNode) -> Decimal:
         base_rate = node.propagation_rate
         base_retention = Decimal("1") - base_rate
 
@@ -201,124 +344,44 @@ class RevenueCalculator:
 
         return Decimal("1") - effective_retention
 
-    def _distribute_recursive(
-        self,
-        *,
-        task_id: str,
-        node_id: str,
-        amount: Decimal,
-        propagation_level: int,
-        path: set[str],
-        out: list[RevenueAllocation],
-    ) -> None:
-        if amount < _MONEY_QUANT:
-            return
+    def _split_pool_cents(self, pool: Decimal, node_id: str) -> dict[str, int] | None:
+        """
+        Split a pool across a node's upstream nodes by reference weight, in integer cents.
+
+        Returns None when there is nothing to split into (no upstream edges, or no positive weight).
+        """
+        # Upstream weights only decide each node's share of the pool, so they are
+        # computed as floats; the pool itself and all shares stay exact.
+        upstream_ids, edge_weights = self._graph.upstream_columns(node_id)
+        weight_items: list[tuple[str, float]] = []
+        for upstream_id, edge_weight in zip(upstream_ids, edge_weights):
+            combined_weight = self._node_weight(upstream_id) * edge_weight
+            if combined_weight <= 0:
+                continue
+            weight_items.append((upstream_id, combined_weight))
 
-        node = self._graph.node(node_id)
+        total_weight = sum(w for _, w in weight_items)
+        if total_weight <= 0:
+            return None
 
-        path_key = node_id
-        if path_key in path:
-            propagation_rate = Decimal("0")
-        elif propagation_level >= self._config.max_propagation_depth:
-            propagation_rate = Decimal("0")
-        else:
-            propagation_rate = self._effective_propagation_rate(node)
+        cents = _split_cents(int(pool.scaleb(2)), [w for _, w in weight_items], total_weight)
+        # Several edges may point at the same upstream node; their shares add up.
+        cents_by_node: dict[str, int] = {}
+        for (upstream_id, _), c in zip(weight_items, cents):
+            cents_by_node[upstream_id] = cents_by_node.get(upstream_id, 0) + c
+        return cents_by_node
 
-        pool = _quantize_money(amount * propagation_rate, rounding=ROUND_DOWN)
-        if pool < self._config.min_propagation_amount:
-            pool = Decimal("0.00")
-        retention = amount - pool
 
-        if retention >= _MONEY_QUANT:
-            out.append(
-                RevenueAllocation(
-                    task_id=task_id,
-                    node_id=node.id,
-                    user_id=node.creator_id,
-                    amount=retention,
-                    source="direct" if propagation_level == 0 else "propagation",
-                    propagation_level=propagation_level,
-                )
-            )
+_worker_calculator: RevenueCalculator | None = None
 
-        if pool < _MONEY_QUANT:
-            return
 
-        upstream_edges = self._graph.upstream_edges(node_id)
-        if not upstream_edges:
-            out.append(
-                RevenueAllocation(
-                    task_id=task_id,
-                    node_id=node.id,
-                    user_id=node.creator_id,
-                    amount=pool,
-                    source="direct" if propagation_level == 0 else "propagation",
-                    propagation_level=propagation_level,
-                )
-            )
-            return
-
-        weight_items: list[tuple[str, Decimal]] = []
-        for edge in upstream_edges:
-            upstream_node = self._graph.node(edge.to_node_id)
-            effective_citation_count = max(
-                upstream_node.citation_count,
-                self._graph.incoming_citation_count(upstream_node.id),
-            )
-            node_weight = calculate_reference_weight(
-                created_at=upstream_node.created_at,
-                now=self._weight_calculator.now,
-                citation_count=effective_citation_count,
-                creativity_factor=upstream_node.creativity_factor,
-            )
-            combined_weight = node_weight * edge.weight
-            if combined_weight <= 0:
-                continue
-            weight_items.append((upstream_node.id, combined_weight))
+def _init_distribute_worker(calculator: RevenueCalculator) -> None:
+    global _worker_calculator
+    _worker_calculator = calculator
 
-        total_weight = sum((w for _, w in weight_items), Decimal("0"))
-        if total_weight <= 0:
-            out.append(
-                RevenueAllocation(
-                    task_id=task_id,
-                    node_id=node.id,
-                    user_id=node.creator_id,
-                    amount=pool,
-                    source="direct" if propagation_level == 0 else "propagation",
-                    propagation_level=propagation_level,
-                )
-            )
-            return
-
-        raw_shares: list[tuple[str, Decimal, Decimal, Decimal]] = []
-        floor_sum = Decimal("0")
-        for upstream_id, weight in weight_items:
-            raw = (pool * weight) / total_weight
-            floored = _quantize_money(raw, rounding=ROUND_DOWN)
-            remainder = raw - floored
-            raw_shares.append((upstream_id, raw, floored, remainder))
-            floor_sum += floored
-
-        remaining = pool - floor_sum
-        remaining_cents = int((remaining / _MONEY_QUANT).to_integral_value(rounding=ROUND_DOWN))
-        raw_shares.sort(key=lambda item: (-item[3], item[0]))
-
-        shares_by_node: dict[str, Decimal] = {nid: floored for nid, _, floored, _ in raw_shares}
-        for i in range(remaining_cents):
-            nid = raw_shares[i % len(raw_shares)][0]
-            shares_by_node[nid] = shares_by_node[nid] + _MONEY_QUANT
-
-        new_path = set(path)
-        new_path.add(path_key)
-        for upstream_id, share in sorted(shares_by_node.items(), key=lambda item: item[0]):
-            share = _quantize_money(share)
-            if share < _MONEY_QUANT:
-                continue
-            self._distribute_recursive(
-                task_id=task_id,
-                node_id=upstream_id,
-                amount=share,
-                propagation_level=propagation_level + 1,
-                path=new_path,
-                out=out,
-            )
+
+def _distribute_worker(item: tuple[str, str, Decimal | int | str]) -> tuple[RevenueAllocation, ...]:
+    if _worker_calculator is None:
+        raise RuntimeError("distribute worker used without initializer")
+    task_id, node_id, total_revenue = item
+    return _worker_calculator.distribute(task_id=task_id, node_id=node_id, total_revenue=total_revenue)
@@ -1,33 +1,39 @@
 from __future__ import annotations
 
 import datetime as dt
+import functools
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any
+from typing import Any, Callable
 
 
 _DAYS_PER_YEAR = Decimal("365")
 
+# Factors the scripts assign to every node; shared instances, not rebuilt per node.
+DEFAULT_CREATIVITY_FACTOR = Decimal("1.0")
+DEFAULT_PROPAGATION_RATE = Decimal("0.3")
+
+
+_DECIMAL_CONVERTERS: dict[type, Callable[[Any], Decimal]] = {
+    Decimal: lambda v: v,
+    int: Decimal,
+    str: Decimal,
+    float: lambda v: Decimal(str(v)),
+}
+
 
 def _to_decimal(value: Any, *, field: str) -> Decimal:
-    if isinstance(value, Decimal):
-        return value
-    if isinstance(value, int):
-        return Decimal(value)
-    if isinstance(value, str):
-        return Decimal(value)
-    if isinstance(value, float):
-        return Decimal(str(value))
+    convert = _DECIMAL_CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    # Subclasses (e.g. bool) miss the exact-type lookup; keep isinstance semantics for them.
+    for base, convert in _DECIMAL_CONVERTERS.items():
+        if isinstance(value, base):
+            return convert(value)
     raise TypeError(f"{field} must be Decimal|int|str|float, got {type(value).__name__}")
 
 
-def calculate_time_priority_factor(*, created_at: dt.datetime | dt.date, now: dt.datetime) -> Decimal:
-    """
-    Calculate the PRD time-priority factor (earlier nodes => higher factor).
-
-    PRD reference:
-      time_factor = 1 / (1 + (now - created_at).days / 365)
-    """
+def _elapsed_days(*, created_at: dt.datetime | dt.date, now: dt.datetime) -> int:
     if isinstance(created_at, dt.date) and not isinstance(created_at, dt.datetime):
         created_at = dt.datetime.combine(created_at, dt.time(0, 0))
     if created_at.tzinfo is None and now.tzinfo is not None:
@@ -36,7 +42,22 @@ def calculate_time_priority_factor(*, created_at: dt.datetime | dt.date, now: dt
     delta_days = (now - created_at).days
     if delta_days < 0:
         delta_days = 0
+    return delta_days
+
+
+def calculate_time_priority_factor(*, created_at: dt.datetime | dt.date, now: dt.datetime) -> Decimal:
+    """
+    Calculate the PRD time-priority factor (earlier nodes => higher factor).
 
+    PRD reference:
+      time_factor = 1 / (1 + (now - created_at).days / 365)
+    """
+    return _time_priority_for_days(_elapsed_days(created_at=created_at, now=now))
+
+
+@functools.lru_cache(maxsize=4096)
+def _time_priority_for_days(delta_days: int) -> Decimal:
+    # Only the whole-day delta matters, and a project has few distinct creation dates.
     return Decimal("1") / (Decimal("1") + (Decimal(delta_days) / _DAYS_PER_YEAR))
 
 
@@ -61,6 +82,29 @@ def calculate_reference_weight(
     return Decimal(citation_count) * time_factor * creativity
 
 
+def calculate_reference_weight_float(
+    *,
+    created_at: dt.datetime | dt.date,
+    now: dt.datetime,
+    citation_count: int,
+    creativity_factor: float = 1.0,
+) -> float:
+    """
+    Float variant of calculate_reference_weight for relative weighting on hot paths.
+
+    Only use it where the result is a ratio between weights, never as a money amount.
+    """
+    divisor = _time_priority_divisor_for_days(_elapsed_days(created_at=created_at, now=now))
+    return citation_count * creativity_factor / divisor
+
+
+@functools.lru_cache(maxsize=4096)
+def _time_priority_divisor_for_days(delta_days: int) -> float:
+    # Float counterpart of _time_priority_for_days; dividing by the cached divisor keeps the
+    # result bit-identical to the uncached 1 + days / 365 expression.
+    return 1.0 + delta_days / 365.0
+
+
 @dataclass(frozen=True)
 class WeightCalculator:
     now: dt.datetime
@@ -2,16 +2,17 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import functools
+import io
+import sys
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Iterable, Sequence
 
 try:
     from utils.csv_parser import ParsedGraph, ParsedNode, ParsedUser, parse_feishu_tasks_csv
 except ModuleNotFoundError:  # pragma: no cover
-    import sys
-
     sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
     from utils.csv_parser import ParsedGraph, ParsedNode, ParsedUser, parse_feishu_tasks_csv
 
@@ -66,15 +67,17 @@ class SeedRevenueDistribution:
 
 @dataclass(frozen=True)
 class SeedData:
-    users: tuple[SeedUser, ...]
-    nodes: tuple[SeedNode, ...]
-    citations: tuple[SeedCitation, ...]
-    revenue_distributions: tuple[SeedRevenueDistribution, ...]
+    users: Sequence[SeedUser]
+    nodes: Sequence[SeedNode]
+    citations: Sequence[SeedCitation]
+    revenue_distributions: Sequence[SeedRevenueDistribution]
 
 
 def _sql_text(value: str | None) -> str:
     if value is None:
         return "NULL"
+    if "'" not in value:
+        return "'" + value + "'"
     return "'" + value.replace("'", "''") + "'"
 
 
@@ -84,6 +87,9 @@ def _sql_uuid(value: uuid.UUID | None) -> str:
     return f"'{value}'::uuid"
 
 
+# Seeds share one `now` plus one timestamp per distinct created date, so few distinct values.
+# Equal aware datetimes in other offsets hit the same entry; they denote the same timestamptz.
+@functools.lru_cache(maxsize=1024)
 def _sql_timestamptz(value: dt.datetime | None) -> str:
     if value is None:
         return "DEFAULT"
@@ -117,55 +123,55 @@ def _revenue_id(
 def generate_seed_from_graph(graph: ParsedGraph, *, now: dt.datetime | None = None) -> SeedData:
     now = now or dt.datetime.now(tz=dt.timezone.utc)
 
-    seed_users = tuple(
+    seed_users = [
         SeedUser(id=_user_id(u.username), username=u.username, created_at=now) for u in graph.users
-    )
+    ]
     user_id_by_username = {u.username: u.id for u in seed_users}
 
     node_id_by_source_ref: dict[str, uuid.UUID] = {}
-    node_by_source_ref: dict[str, ParsedNode] = {}
+    node_id_by_title: dict[str, uuid.UUID] = {}  # first node wins for duplicate titles
+    creator_id_by_source_ref: dict[str, uuid.UUID | None] = {}  # also the propagation beneficiary
+    # Bound methods hoisted out of the per-row loops below.
+    get_user_id = user_id_by_username.get
+    get_node_id = node_id_by_source_ref.get
+    get_node_id_by_title = node_id_by_title.get
+    midnight = dt.time(0, 0)
+    utc = dt.timezone.utc
+
     seed_nodes: list[SeedNode] = []
+    append_node = seed_nodes.append
     for n in graph.nodes:
-        nid = _node_id(n)
-        node_id_by_source_ref[n.source_ref] = nid
-        node_by_source_ref[n.source_ref] = n
-
-        creator_username = (n.managers[0] if n.managers else None) or (
-            n.executors[0] if n.executors else None
-        )
-        creator_id = user_id_by_username.get(creator_username) if creator_username else None
-        created_at = (
-            dt.datetime.combine(n.created_date, dt.time(0, 0), tzinfo=dt.timezone.utc)
-            if n.created_date
-            else now
+        title, source_ref, managers, executors, created_date = (
+            n.title, n.source_ref, n.managers, n.executors, n.created_date
         )
-        seed_nodes.append(
+        nid = _node_id(n)
+        node_id_by_source_ref[source_ref] = nid
+        node_id_by_title.setdefault(title, nid)
+
+        creator_username = (managers[0] if managers else None) or (executors[0] if executors else None)
+        creator_id = get_user_id(creator_username) if creator_username else None
+        creator_id_by_source_ref[source_ref] = creator_id
+        created_at = dt.datetime.combine(created_date, midnight, tzinfo=utc) if created_date else now
+        append_node(
             SeedNode(
                 id=nid,
-                title=n.title,
+                title=title,
                 node_type=n.node_type,
                 creator_id=creator_id,
                 created_at=created_at,
                 source=n.source,
-                source_ref=n.source_ref,
+                source_ref=source_ref,
             )
         )
 
-    node_ids_by_title: dict[str, list[uuid.UUID]] = {}
-    for n in seed_nodes:
-        node_ids_by_title.setdefault(n.title, []).append(n.id)
-
     seed_citations: list[SeedCitation] = []
+    append_citation = seed_citations.append
     for c in graph.citations:
-        from_id = node_id_by_source_ref.get(c.from_source_ref) or node_ids_by_title.get(
-            c.from_title, [None]
-        )[0]
-        to_id = node_id_by_source_ref.get(c.to_source_ref) or node_ids_by_title.get(
-            c.to_title, [None]
-        )[0]
+        from_id = get_node_id(c.from_source_ref) or get_node_id_by_title(c.from_title)
+        to_id = get_node_id(c.to_source_ref) or get_node_id_by_title(c.to_title)
         if from_id is None or to_id is None:
             continue
-        seed_citations.append(
+        append_citation(
             SeedCitation(
                 id=_citation_id(from_id, to_id),
                 from_node_id=from_id,
@@ -177,16 +183,17 @@ def generate_seed_from_graph(graph: ParsedGraph, *, now: dt.datetime | None = No
 
     # Simple, deterministic sample revenue rows (for integration testing).
     seed_revenue: list[SeedRevenueDistribution] = []
+    append_revenue = seed_revenue.append
     for n in graph.nodes:
-        task_id = node_id_by_source_ref[n.source_ref]
         executors = n.executors
         if executors:
+            task_id = node_id_by_source_ref[n.source_ref]
             per_user_amount = "100.00"
             for username in executors:
-                uid = user_id_by_username.get(username)
+                uid = get_user_id(username)
                 if uid is None:
                     continue
-                seed_revenue.append(
+                append_revenue(
                     SeedRevenueDistribution(
                         id=_revenue_id(
                             task_id=task_id,
@@ -205,25 +212,18 @@ def generate_seed_from_graph(graph: ParsedGraph, *, now: dt.datetime | None = No
                     )
                 )
 
+    get_creator_id = creator_id_by_source_ref.get
     for c in graph.citations:
-        child_id = node_id_by_source_ref.get(c.from_source_ref)
-        parent_id = node_id_by_source_ref.get(c.to_source_ref)
+        child_id = get_node_id(c.from_source_ref)
+        parent_id = get_node_id(c.to_source_ref)
         if child_id is None or parent_id is None:
             continue
 
-        parent_node = node_by_source_ref.get(c.to_source_ref)
-        if parent_node is None:
-            continue
-        beneficiary = (parent_node.managers[0] if parent_node.managers else None) or (
-            parent_node.executors[0] if parent_node.executors else None
-        )
-        if beneficiary is None:
-            continue
-        uid = user_id_by_username.get(beneficiary)
+        uid = get_creator_id(c.to_source_ref)
         if uid is None:
             continue
 
-        seed_revenue.append(
+        append_revenue(
             SeedRevenueDistribution(
                 id=_revenue_id(
                     task_id=child_id,
@@ -244,9 +244,9 @@ def generate_seed_from_graph(graph: ParsedGraph, *, now: dt.datetime | None = No
 
     return SeedData(
         users=seed_users,
-        nodes=tuple(seed_nodes),
-        citations=tuple(seed_citations),
-        revenue_distributions=tuple(seed_revenue),
+        nodes=seed_nodes,
+        citations=seed_citations,
+        revenue_distributions=seed_revenue,
     )
 
 
@@ -255,51 +255,167 @@ def generate_seed_from_feishu_csv(csv_path: str | Path) -> SeedData:
     return generate_seed_from_graph(graph)
 
 
-def seed_to_sql(seed: SeedData) -> str:
-    lines: list[str] = []
-    lines.append("BEGIN;")
-    lines.append("")
-
-    for u in seed.users:
-        lines.append(
-            "INSERT INTO users (id, username, reputation_score, contribution_score, level, violation_count, created_at)"
-            f" VALUES ({_sql_uuid(u.id)}, {_sql_text(u.username)}, {u.reputation_score}, {u.contribution_score},"
+_SQL_BATCH_SIZE = 500
+
+
+def _write_batched_insert(
+    write: Callable[[str], Any],
+    *,
+    head: str,
+    rows: Iterable[str],
+    tail: str,
+    batch_size: int = _SQL_BATCH_SIZE,
+) -> None:
+    """Emit `head VALUES (...),(...) tail;` statements of at most batch_size rows each."""
+    batch: list[str] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            write(f"{head} VALUES\n  " + ",\n  ".join(batch) + f"\n{tail};\n")
+            batch = []
+    if batch:
+        write(f"{head} VALUES\n  " + ",\n  ".join(batch) + f"\n{tail};\n")
+
+
+def write_seed_sql(seed: SeedData, write: Callable[[str], Any]) -> None:
+    """Stream the seed as a single transaction of multi-row INSERTs into `write`."""
+    # Node and user ids recur across rows (creators, citation endpoints, revenue rows),
+    # so their literals are formatted once; per-row citation/revenue ids are one-off.
+    ref_literals: dict[uuid.UUID | None, str] = {None: "NULL"}
+
+    def ref_uuid(value: uuid.UUID | None) -> str:
+        literal = ref_literals.get(value)
+        if literal is None:
+            literal = ref_literals[value] = _sql_uuid(value)
+        return literal
+
+    write("BEGIN;\n\n")
+
+    _write_batched_insert(
+        write,
+        head="INSERT INTO users (id, username, reputation_score, contribution_score, level, violation_count, created_at)",
+        rows=(
+            f"({ref_uuid(u.id)}, {_sql_text(u.username)}, {u.reputation_score}, {u.contribution_score},"
             f" {_sql_text(u.level)}::user_level, {u.violation_count}, {_sql_timestamptz(u.created_at)})"
-            " ON CONFLICT (username) DO NOTHING;"
-        )
-    lines.append("")
-
-    for n in seed.nodes:
-        lines.append(
-            "INSERT INTO nodes (id, title, type, creator_id, created_at, api_call_count, citation_count, source, source_ref)"
-            f" VALUES ({_sql_uuid(n.id)}, {_sql_text(n.title)}, {_sql_text(n.node_type)}::node_type,"
-            f" {_sql_uuid(n.creator_id)}, {_sql_timestamptz(n.created_at)}, {n.api_call_count}, {n.citation_count},"
+            for u in seed.users
+        ),
+        tail="ON CONFLICT (username) DO NOTHING",
+    )
+    write("\n")
+
+    _write_batched_insert(
+        write,
+        head="INSERT INTO nodes (id, title, type, creator_id, created_at, api_call_count, citation_count, source, source_ref)",
+        rows=(
+            f"({ref_uuid(n.id)}, {_sql_text(n.title)}, {_sql_text(n.node_type)}::node_type,"
+            f" {ref_uuid(n.creator_id)}, {_sql_timestamptz(n.created_at)}, {n.api_call_count}, {n.citation_count},"
             f" {_sql_text(n.source)}, {_sql_text(n.source_ref)})"
-            " ON CONFLICT (id) DO NOTHING;"
-        )
-    lines.append("")
+            for n in seed.nodes
+        ),
+        tail="ON CONFLICT (id) DO NOTHING",
+    )
+    write("\n")
 
-    for c in seed.citations:
-        lines.append(
-            "INSERT INTO citations (id, from_node_id, to_node_id, weight, created_at)"
-            f" VALUES ({_sql_uuid(c.id)}, {_sql_uuid(c.from_node_id)}, {_sql_uuid(c.to_node_id)}, {c.weight},"
+    _write_batched_insert(
+        write,
+        head="INSERT INTO citations (id, from_node_id, to_node_id, weight, created_at)",
+        rows=(
+            f"({_sql_uuid(c.id)}, {ref_uuid(c.from_node_id)}, {ref_uuid(c.to_node_id)}, {c.weight},"
             f" {_sql_timestamptz(c.created_at)})"
-            " ON CONFLICT ON CONSTRAINT citations_unique_edge DO NOTHING;"
-        )
-    lines.append("")
+            for c in seed.citations
+        ),
+        tail="ON CONFLICT ON CONSTRAINT citations_unique_edge DO NOTHING",
+    )
+    write("\n")
 
-    for r in seed.revenue_distributions:
-        lines.append(
-            "INSERT INTO revenue_distributions (id, task_id, node_id, user_id, amount, source, propagation_level, created_at)"
-            f" VALUES ({_sql_uuid(r.id)}, {_sql_uuid(r.task_id)}, {_sql_uuid(r.node_id)}, {_sql_uuid(r.user_id)},"
+    _write_batched_insert(
+        write,
+        head="INSERT INTO revenue_distributions (id, task_id, node_id, user_id, amount, source, propagation_level, created_at)",
+        rows=(
+            f"({_sql_uuid(r.id)}, {ref_uuid(r.task_id)}, {ref_uuid(r.node_id)}, {ref_uuid(r.user_id)},"
             f" {r.amount}::numeric(10,2), {_sql_text(r.source)}::revenue_source, {r.propagation_level},"
             f" {_sql_timestamptz(r.created_at)})"
-            " ON CONFLICT (id) DO NOTHING;"
-        )
+            for r in seed.revenue_distributions
+        ),
+        tail="ON CONFLICT (id) DO NOTHING",
+    )
+
+    write("\nCOMMIT;\n")
+
 
-    lines.append("")
-    lines.append("COMMIT;")
-    return "\n".join(lines) + "\n"
+def seed_to_sql(seed: SeedData) -> str:
+    buf = io.StringIO()
+    write_seed_sql(seed, buf.write)
+    return buf.getvalue()
+
+
+def seed_to_database(seed: SeedData, conn: Any) -> None:
+    """
+    Load the seed through COPY on a psycopg 3 connection, in one transaction.
+
+    COPY has no ON CONFLICT, so rows go into temporary staging tables first and are
+    merged with the same conflict rules as seed_to_sql; loading stays idempotent.
+    Each staging table is dropped after its merge, so several seeds can share one
+    outer transaction.
+    A missing created_at falls back to now(), like DEFAULT in the SQL output.
+    """
+    tables: tuple[tuple[str, tuple[str, ...], str, Iterable[tuple[Any, ...]]], ...] = (
+        (
+            "users",
+            ("id", "username", "reputation_score", "contribution_score", "level", "violation_count", "created_at"),
+            "ON CONFLICT (username) DO NOTHING",
+            (
+                (u.id, u.username, u.reputation_score, u.contribution_score, u.level, u.violation_count, u.created_at)
+                for u in seed.users
+            ),
+        ),
+        (
+            "nodes",
+            ("id", "title", "type", "creator_id", "created_at", "api_call_count", "citation_count", "source", "source_ref"),
+            "ON CONFLICT (id) DO NOTHING",
+            (
+                (
+                    n.id, n.title, n.node_type, n.creator_id, n.created_at,
+                    n.api_call_count, n.citation_count, n.source, n.source_ref,
+                )
+                for n in seed.nodes
+            ),
+        ),
+        (
+            "citations",
+            ("id", "from_node_id", "to_node_id", "weight", "created_at"),
+            "ON CONFLICT ON CONSTRAINT citations_unique_edge DO NOTHING",
+            ((c.id, c.from_node_id, c.to_node_id, c.weight, c.created_at) for c in seed.citations),
+        ),
+        (
+            "revenue_distributions",
+            ("id", "task_id", "node_id", "user_id", "amount", "source", "propagation_level", "created_at"),
+            "ON CONFLICT (id) DO NOTHING",
+            (
+                (r.id, r.task_id, r.node_id, r.user_id, r.amount, r.source, r.propagation_level, r.created_at)
+                for r in seed.revenue_distributions
+            ),
+        ),
+    )
+
+    with conn.transaction(), conn.cursor() as cur:
+        for table, columns, on_conflict, rows in tables:
+            staging = f"_seed_{table}"
+            column_list = ", ".join(columns)
+            select_list = ", ".join(
+                "COALESCE(created_at, now())" if col == "created_at" else col for col in columns
+            )
+            cur.execute(
+                f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS"
+                f" SELECT {column_list} FROM {table} WITH NO DATA"
+            )
+            with cur.copy(f"COPY {staging} ({column_list}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+            cur.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {select_list} FROM {staging} {on_conflict}"
+            )
+            cur.execute(f"DROP TABLE {staging}")
 
 
 def main() -> int:
@@ -317,11 +433,11 @@ def main() -> int:
         raise FileNotFoundError(f"CSV not found: {csv_path}")
 
     seed = generate_seed_from_feishu_csv(csv_path)
-    sql = seed_to_sql(seed)
     if args.out:
-        Path(args.out).write_text(sql, encoding="utf-8")
+        with Path(args.out).open("w", encoding="utf-8") as f:
+            write_seed_sql(seed, f.write)
     else:
-        print(sql)
+        write_seed_sql(seed, sys.stdout.write)
     return 0
 
 
@@ -7,12 +7,15 @@
 
 import argparse
 import datetime as dt
-import json
+import sys
+from collections import Counter
 from decimal import Decimal
 from pathlib import Path
 
 from utils.csv_parser import parse_feishu_tasks_csv
+from utils.json_io import dump_json
 from core.revenue_calculator import RevenueCalculator, RevenueGraph, RevenueNode, RevenueEdge
+from core.weight_calculator import DEFAULT_CREATIVITY_FACTOR, DEFAULT_PROPAGATION_RATE
 
 
 def save_intermediate_data(data, filename, description):
@@ -20,8 +23,7 @@ def save_intermediate_data(data, filename, description):
     filepath = Path("logs") / filename
     filepath.parent.mkdir(exist_ok=True)
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    dump_json(data, filepath, default=str)
 
     print(f"   💾 {description} -> {filepath}")
 
@@ -87,6 +89,7 @@ def main():
     print(f"{'='*70}")
 
     # 创建节点映射
+    incoming_counts = Counter(c.to_title for c in parsed.citations)
     node_map = {}
     for node in parsed.nodes:
         # 使用title作为节点ID（简化演示）
@@ -94,9 +97,9 @@ def main():
             id=node.title,
             creator_id=node.executors[0] if node.executors else "未分配",
             created_at=node.created_date or dt.date.today(),
-            citation_count=sum(1 for c in parsed.citations if c.to_title == node.title),
-            creativity_factor=Decimal("1.0"),  # 简化：统一设为1.0
-            propagation_rate=Decimal("0.3"),  # 简化：统一30%传导率
+            citation_count=incoming_counts.get(node.title, 0),
+            creativity_factor=DEFAULT_CREATIVITY_FACTOR,  # 简化：统一设为1.0
+            propagation_rate=DEFAULT_PROPAGATION_RATE,  # 简化：统一30%传导率
         )
 
     # 中间结果2: 节点构建结果
@@ -118,15 +121,19 @@ def main():
     if args.debug:
         save_intermediate_data(nodes_construction, "02_nodes_construction.json", "节点构建结果")
 
-    # 创建引用边
+    # 创建引用边（引用权重取值很少，每种取值只转换一次Decimal）
+    edge_weights: dict[float, Decimal] = {}
     edges = []
     edge_errors = []
     for citation in parsed.citations:
         if citation.from_title in node_map and citation.to_title in node_map:
+            weight = edge_weights.get(citation.weight)
+            if weight is None:
+                weight = edge_weights[citation.weight] = Decimal(str(citation.weight))
             edges.append(RevenueEdge(
                 from_node_id=citation.from_title,
                 to_node_id=citation.to_title,
-                weight=Decimal(str(citation.weight))
+                weight=weight
             ))
         else:
             edge_errors.append({
@@ -179,6 +186,7 @@ def main():
     print(f"传导率: {float(trigger_node.propagation_rate) * 100:.0f}%")
 
     # Step 4: 执行收益分配
+    total_revenue = Decimal(str(args.revenue))
     graph = RevenueGraph(
         nodes=list(node_map.values()),
         edges=edges
@@ -189,7 +197,7 @@ def main():
     results = calculator.distribute(
         task_id=trigger_task,
         node_id=trigger_task,
-        total_revenue=Decimal(str(args.revenue))
+        total_revenue=total_revenue
     )
 
     # 中间结果4: 分配结果详情
@@ -233,34 +241,40 @@ def main():
     print("-" * 70)
 
     user_totals = {}
+    user_node_counts = Counter(r.user_id for r in results)
     for r in results:
         user = r.user_id
         if user not in user_totals:
-            user_totals[user] = {"direct": Decimal("0"), "propagation": Decimal("0")}
+            user_totals[user] = {"direct": Decimal("0"), "propagation": Decimal("0"), "total": Decimal("0")}
 
+        amounts = user_totals[user]
         if r.source == "direct":
-            user_totals[user]["direct"] += r.amount
+            amounts["direct"] += r.amount
         else:
-            user_totals[user]["propagation"] += r.amount
+            amounts["propagation"] += r.amount
+        amounts["total"] += r.amount
 
     # 按总收益排序
     sorted_users = sorted(
         user_totals.items(),
-        key=lambda x: x[1]["direct"] + x[1]["propagation"],
+        key=lambda x: x[1]["total"],
         reverse=True
     )
 
+    # 表格行先拼好再一次性写出，避免逐行print
+    rows = []
     for user, amounts in sorted_users:
-        total = amounts["direct"] + amounts["propagation"]
-        node_count = len([r for r in results if r.user_id == user])
-        print(f"{user:<20} ¥{amounts['direct']:>10.2f} ¥{amounts['propagation']:>10.2f} ¥{total:>10.2f} {node_count:>6}")
+        total = amounts["total"]
+        node_count = user_node_counts[user]
+        rows.append(f"{user:<20} ¥{amounts['direct']:>10.2f} ¥{amounts['propagation']:>10.2f} ¥{total:>10.2f} {node_count:>6}\n")
+    sys.stdout.write("".join(rows))
 
     print("-" * 70)
-    total_distributed = sum(amounts["direct"] + amounts["propagation"] for _, amounts in user_totals.items())
+    total_distributed = sum(amounts["total"] for amounts in user_totals.values())
     print(f"{'总计':<20} {'':>12} {'':>12} ¥{total_distributed:>10.2f}")
 
     # 验证金额
-    expected = Decimal(str(args.revenue))
+    expected = total_revenue
     if abs(total_distributed - expected) > Decimal("0.01"):
         print(f"\n⚠️  警告: 分配总额 ¥{total_distributed:.2f} 与预期 ¥{expected:.2f} 不符")
     else:
@@ -291,7 +305,7 @@ def main():
             user: {
                 "direct": float(amounts["direct"]),
                 "propagation": float(amounts["propagation"]),
-                "total": float(amounts["direct"] + amounts["propagation"])
+                "total": float(amounts["total"])
             }
             for user, amounts in user_totals.items()
         },
@@ -303,8 +317,7 @@ def main():
     }
 
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            json.dump(final_output, f, ensure_ascii=False, indent=2)
+        dump_json(final_output, args.output)
         print(f"\n💾 最终结果已保存到: {args.output}")
 
     if args.debug:
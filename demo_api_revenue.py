@@ -7,13 +7,15 @@
 
 import argparse
 import datetime as dt
-import json
+import sys
 from decimal import Decimal
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 from utils.csv_parser import parse_feishu_tasks_csv
+from utils.json_io import dump_json
 from core.revenue_calculator import RevenueCalculator, RevenueGraph, RevenueNode, RevenueEdge
+from core.weight_calculator import DEFAULT_CREATIVITY_FACTOR, DEFAULT_PROPAGATION_RATE
 
 
 def save_intermediate_data(data, filename, description):
@@ -21,8 +23,7 @@ def save_intermediate_data(data, filename, description):
     filepath = Path("logs") / filename
     filepath.parent.mkdir(exist_ok=True)
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    dump_json(data, filepath, default=str)
 
     print(f"   💾 {description} -> {filepath}")
 
@@ -33,6 +34,7 @@ def main():
     parser.add_argument("--revenue-per-call", type=float, default=1.0, help="每次API调用的收益金额（默认1元）")
     parser.add_argument("--output", help="输出JSON文件路径（可选）")
     parser.add_argument("--debug", action="store_true", help="启用调试模式（保存所有中间结果）")
+    parser.add_argument("--workers", type=int, default=1, help="并行计算的进程数（默认1，即不启用进程池）")
     args = parser.parse_args()
 
     # Step 1: 解析CSV
@@ -88,25 +90,30 @@ def main():
     print(f"{'='*70}")
 
     # 创建节点映射
+    incoming_counts = Counter(c.to_title for c in parsed.citations)
     node_map = {}
     for node in parsed.nodes:
         node_map[node.title] = RevenueNode(
             id=node.title,
             creator_id=node.executors[0] if node.executors else "未分配",
             created_at=node.created_date or dt.date.today(),
-            citation_count=sum(1 for c in parsed.citations if c.to_title == node.title),
-            creativity_factor=Decimal("1.0"),
-            propagation_rate=Decimal("0.3"),
+            citation_count=incoming_counts.get(node.title, 0),
+            creativity_factor=DEFAULT_CREATIVITY_FACTOR,
+            propagation_rate=DEFAULT_PROPAGATION_RATE,
         )
 
-    # 创建引用边
+    # 创建引用边（引用权重取值很少，每种取值只转换一次Decimal）
+    edge_weights: dict[float, Decimal] = {}
     edges = []
     for citation in parsed.citations:
         if citation.from_title in node_map and citation.to_title in node_map:
+            weight = edge_weights.get(citation.weight)
+            if weight is None:
+                weight = edge_weights[citation.weight] = Decimal(str(citation.weight))
             edges.append(RevenueEdge(
                 from_node_id=citation.from_title,
                 to_node_id=citation.to_title,
-                weight=Decimal(str(citation.weight))
+                weight=weight
             ))
 
     nodes_construction = {
@@ -136,24 +143,40 @@ def main():
 
     calculator = RevenueCalculator(graph=graph)
 
-    # 汇总所有API任务的收益分配
-    all_allocations = []
+    # 汇总所有API任务的收益分配（边分配边累加到用户，不保留全部分配记录）
+    revenue_per_call = Decimal(str(args.revenue_per_call))
+    user_totals = defaultdict(lambda: {"direct": Decimal("0"), "propagation": Decimal("0"), "total": Decimal("0")})
+    user_tasks = defaultdict(set)  # 用户 -> 来源任务集合
+    total_allocations = 0
     api_task_details = []
 
-    for api_node in api_tasks:
-        total_revenue = Decimal(str(api_node.api_call_count * args.revenue_per_call))
+    # API任务可能有上千个，逐条输出先缓存，循环结束后一次性写出
+    out = []
 
-        print(f"\n  处理API: {api_node.title[:40]}")
-        print(f"    调用次数: {api_node.api_call_count:,} 次")
-        print(f"    总收益: ¥{float(total_revenue):,.2f}")
+    # 各API任务的分配互不依赖，批量计算（--workers 大于1时才使用进程池）
+    revenues = [Decimal(n.api_call_count) * revenue_per_call for n in api_tasks]
+    all_results = calculator.distribute_many(
+        ((n.title, n.title, total_revenue) for n, total_revenue in zip(api_tasks, revenues)),
+        max_workers=args.workers,
+    )
 
-        results = calculator.distribute(
-            task_id=api_node.title,
-            node_id=api_node.title,
-            total_revenue=total_revenue
+    for api_node, total_revenue, results in zip(api_tasks, revenues, all_results):
+        out.append(
+            f"\n  处理API: {api_node.title[:40]}\n"
+            f"    调用次数: {api_node.api_call_count:,} 次\n"
+            f"    总收益: ¥{float(total_revenue):,.2f}\n"
         )
 
-        all_allocations.extend(results)
+        for r in results:
+            user = r.user_id
+            user_tasks[user].add(r.task_id)
+            amounts = user_totals[user]
+            if r.source == "direct":
+                amounts["direct"] += r.amount
+            else:
+                amounts["propagation"] += r.amount
+            amounts["total"] += r.amount
+        total_allocations += len(results)
 
         api_task_details.append({
             "task": api_node.title,
@@ -163,10 +186,12 @@ def main():
             "allocations_count": len(results)
         })
 
+    sys.stdout.write("".join(out))
+
     if args.debug:
         save_intermediate_data({
             "api_tasks": api_task_details,
-            "total_allocations": len(all_allocations)
+            "total_allocations": total_allocations
         }, "api_03_distribution_details.json", "收益分配详情")
 
     # Step 4: 汇总用户收益
@@ -174,32 +199,25 @@ def main():
     print(f"📈 Step 4: 用户收益汇总")
     print(f"{'='*70}")
 
-    user_totals = defaultdict(lambda: {"direct": Decimal("0"), "propagation": Decimal("0")})
-
-    for r in all_allocations:
-        user = r.user_id
-        if r.source == "direct":
-            user_totals[user]["direct"] += r.amount
-        else:
-            user_totals[user]["propagation"] += r.amount
-
     # 按总收益排序
     sorted_users = sorted(
         user_totals.items(),
-        key=lambda x: x[1]["direct"] + x[1]["propagation"],
+        key=lambda x: x[1]["total"],
         reverse=True
     )
 
     print(f"{'用户':<20} {'直接收益':>12} {'传导收益':>12} {'总计':>12} {'来源任务':>8}")
     print("-" * 72)
 
+    rows = []
     for user, amounts in sorted_users:
-        total = amounts["direct"] + amounts["propagation"]
-        task_count = len(set(r.task_id for r in all_allocations if r.user_id == user))
-        print(f"{user:<20} ¥{amounts['direct']:>10.2f} ¥{amounts['propagation']:>10.2f} ¥{total:>10.2f} {task_count:>8}")
+        total = amounts["total"]
+        task_count = len(user_tasks[user])
+        rows.append(f"{user:<20} ¥{amounts['direct']:>10.2f} ¥{amounts['propagation']:>10.2f} ¥{total:>10.2f} {task_count:>8}\n")
+    sys.stdout.write("".join(rows))
 
     print("-" * 72)
-    total_distributed = sum(amounts["direct"] + amounts["propagation"] for _, amounts in user_totals.items())
+    total_distributed = sum(amounts["total"] for amounts in user_totals.values())
     total_expected = sum(n.api_call_count * args.revenue_per_call for n in api_tasks)
     print(f"{'总计':<20} {'':>12} {'':>12} ¥{total_distributed:>10.2f}")
 
@@ -213,7 +231,7 @@ def main():
     print(f"\n总API调用: {csv_parse_result['total_api_calls']:,} 次")
     print(f"总收益: ¥{total_expected:,.2f}")
     print(f"受益用户数: {len(user_totals)}")
-    print(f"分配记录数: {len(all_allocations)}")
+    print(f"分配记录数: {total_allocations}")
 
     # 最终结果: 输出JSON
     final_output = {
@@ -225,20 +243,19 @@ def main():
             user: {
                 "direct": float(amounts["direct"]),
                 "propagation": float(amounts["propagation"]),
-                "total": float(amounts["direct"] + amounts["propagation"])
+                "total": float(amounts["total"])
             }
             for user, amounts in user_totals.items()
         },
         "statistics": {
             "total_users": len(user_totals),
-            "total_allocations": len(all_allocations),
+            "total_allocations": total_allocations,
             "api_tasks_count": len(api_tasks)
         }
     }
 
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as f:
-            json.dump(final_output, f, ensure_ascii=False, indent=2)
+        dump_json(final_output, args.output)
         print(f"\n💾 最终结果已保存到: {args.output}")
 
     if args.debug:
@@ -1,8 +1,12 @@
+import dataclasses
+import json
 import tempfile
 import unittest
 from pathlib import Path
 
-from utils.csv_parser import parse_feishu_tasks_csv
+from utils import csv_parser
+from utils.csv_parser import clear_parse_cache, graph_to_jsonable, parse_feishu_tasks_csv
+from utils.json_io import dumps_json
 
 
 class TestCsvParser(unittest.TestCase):
@@ -33,3 +37,85 @@ class TestCsvParser(unittest.TestCase):
             edges = {(c.from_title, c.to_title) for c in graph.citations}
             self.assertIn(("子任务", "不存在的父任务"), edges)
 
+
+    def test_normalizes_whitespace_and_splits_multivalue_cells(self) -> None:
+        content = "\n".join(
+            [
+                "任务名称,任务执行人,任务管理人,父记录",
+                '"  子　 任务\t", A ，B;　C ,D,父任务',
+                "父任务,,,",
+            ]
+        )
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "x.csv"
+            p.write_text(content, encoding="utf-8")
+            graph = parse_feishu_tasks_csv(p)
+            child = next(n for n in graph.nodes if n.source_ref == "row:1")
+            self.assertEqual(child.title, "子 任务")
+            self.assertEqual(child.executors, ("A", "B", "C"))
+            self.assertEqual(child.managers, ("D",))
+            self.assertEqual(child.parents, ("父任务",))
+
+    def test_graph_to_jsonable_matches_dataclass_fields(self) -> None:
+        content = "\n".join(
+            [
+                "任务名称,任务执行人,父记录,创建日期",
+                "子任务,A,父任务,2025/01/05",
+                ",B,,",
+            ]
+        )
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "x.csv"
+            p.write_text(content, encoding="utf-8")
+            graph = parse_feishu_tasks_csv(p)
+        payload = graph_to_jsonable(graph)
+
+        for key, items in (
+            ("users", graph.users),
+            ("nodes", graph.nodes),
+            ("citations", graph.citations),
+            ("warnings", graph.warnings),
+        ):
+            self.assertGreater(len(items), 0)
+            for item, jsonable in zip(items, payload[key]):
+                expected = {k: list(v) if isinstance(v, tuple) else v for k, v in dataclasses.asdict(item).items()}
+                if key == "nodes":
+                    expected["created_date"] = item.created_date.isoformat() if item.created_date else None
+                    expected["deadline_date"] = None
+                self.assertEqual(jsonable, expected)
+
+    def test_dumps_json_handles_api_count_beyond_64_bits(self) -> None:
+        content = "\n".join(
+            [
+                "任务名称,任务执行人,API调用次数",
+                "接口任务,A,1e20",
+            ]
+        )
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "x.csv"
+            p.write_text(content, encoding="utf-8")
+            graph = parse_feishu_tasks_csv(p)
+        payload = graph_to_jsonable(graph)
+
+        decoded = json.loads(dumps_json(payload))
+        self.assertEqual(decoded["nodes"][0]["api_call_count"], 10**20)
+        self.assertEqual(decoded, json.loads(json.dumps(payload)))
+
+    def test_parse_cache_reuses_graph_until_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            p = Path(td) / "x.csv"
+            p.write_text("任务名称,父记录\n子任务,父任务\n", encoding="utf-8")
+            first = parse_feishu_tasks_csv(p)
+            self.assertIs(parse_feishu_tasks_csv(p), first)
+            self.assertIsNot(parse_feishu_tasks_csv(p, create_missing_parents=False), first)
+
+            p.write_text("任务名称,父记录\n子任务,父任务\n另一个任务,\n", encoding="utf-8")
+            second = parse_feishu_tasks_csv(p)
+            self.assertIn("另一个任务", {n.title for n in second.nodes})
+            # The edited file replaces its old entry instead of adding one per version.
+            cached_graphs = [graph for _, graph in csv_parser._PARSE_CACHE.values()]
+            self.assertIn(second, cached_graphs)
+            self.assertNotIn(first, cached_graphs)
+
+            clear_parse_cache()
+            self.assertIsNot(parse_feishu_tasks_csv(p), second)
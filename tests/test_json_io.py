@@ -0,0 +1,31 @@
+import datetime as dt
+import unittest
+from unittest import mock
+
+from utils import json_io
+from utils.json_io import dumps_json
+
+
+@unittest.skipIf(json_io.orjson is None, "orjson not installed")
+class TestJsonIo(unittest.TestCase):
+    def _assert_backends_match(self, payload: object) -> None:
+        with mock.patch.object(json_io, "orjson", None):
+            expected = dumps_json(payload, default=str)
+        self.assertEqual(dumps_json(payload, default=str), expected)
+
+    def test_backends_match_on_datetime_and_small_float(self) -> None:
+        self._assert_backends_match(
+            {
+                "生成时间": dt.datetime(2024, 1, 1),
+                "日期": dt.date(2024, 1, 1),
+                "权重": [0.3, 1e-05, 2.5e-07, 0.0001, 0.0],
+                "nested": {"amount": 12.5, "total_api_calls": 3},
+            }
+        )
+
+    def test_backends_match_on_large_and_non_finite_floats(self) -> None:
+        self._assert_backends_match({"big": 1e16, "values": [float("nan"), float("inf"), -float("inf")]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,7 @@ from core.revenue_calculator import (
     RevenueGraph,
     RevenueNode,
 )
-from core.weight_calculator import calculate_reference_weight
+from core.weight_calculator import calculate_reference_weight, calculate_reference_weight_float
 
 
 class TestRevenueDistribution(unittest.TestCase):
@@ -26,6 +26,22 @@ class TestRevenueDistribution(unittest.TestCase):
         )
         self.assertEqual(weight, Decimal("10"))
 
+    def test_reference_weight_float_matches_decimal(self) -> None:
+        created_at = (self.now - dt.timedelta(days=100)).date()
+        expected = calculate_reference_weight(
+            created_at=created_at,
+            now=self.now,
+            citation_count=7,
+            creativity_factor=Decimal("1.5"),
+        )
+        weight = calculate_reference_weight_float(
+            created_at=created_at,
+            now=self.now,
+            citation_count=7,
+            creativity_factor=1.5,
+        )
+        self.assertAlmostEqual(weight, float(expected), places=12)
+
     def test_difficulty_compensation_adjusts_upstream_pool(self) -> None:
         task = RevenueNode(
             id="task",
@@ -182,6 +198,70 @@ class TestRevenueDistribution(unittest.TestCase):
         self.assertEqual(by_user["ub"], Decimal("5.00"))
         self.assertEqual(by_user["ua"], Decimal("5.00"))
 
+    def test_duplicate_edges_to_same_upstream_keep_full_pool(self) -> None:
+        leaf = RevenueNode(
+            id="leaf",
+            creator_id="leaf_owner",
+            created_at=self.now,
+            propagation_rate=Decimal("0.5"),
+        )
+        a = RevenueNode(id="a", creator_id="a_owner", created_at=self.now, propagation_rate=Decimal("0"))
+        b = RevenueNode(id="b", creator_id="b_owner", created_at=self.now, propagation_rate=Decimal("0"))
+        graph = RevenueGraph(
+            nodes=[leaf, a, b],
+            edges=[
+                RevenueEdge(from_node_id="leaf", to_node_id="a"),
+                RevenueEdge(from_node_id="leaf", to_node_id="a", weight=Decimal("2")),
+                RevenueEdge(from_node_id="leaf", to_node_id="b"),
+            ],
+        )
+        calc = RevenueCalculator(graph=graph, now=self.now)
+        allocations = calc.distribute(task_id="leaf", node_id="leaf", total_revenue=Decimal("100.00"))
+
+        self.assertEqual(sum(a.amount for a in allocations), Decimal("100.00"))
+        upstream = {a.node_id: a.amount for a in allocations if a.source == "propagation"}
+        self.assertEqual(sum(upstream.values()), Decimal("50.00"))
+        self.assertEqual(set(upstream), {"a", "b"})
+
+    def test_node_without_upstream_keeps_full_amount(self) -> None:
+        node = RevenueNode(
+            id="leaf",
+            creator_id="owner",
+            created_at=self.now,
+            propagation_rate=Decimal("0.3"),
+        )
+        calc = RevenueCalculator(graph=RevenueGraph(nodes=[node]), now=self.now)
+        allocations = calc.distribute(task_id="leaf", node_id="leaf", total_revenue=Decimal("12.34"))
+
+        self.assertEqual(len(allocations), 1)
+        self.assertEqual(allocations[0].user_id, "owner")
+        self.assertEqual(allocations[0].amount, Decimal("12.34"))
+        self.assertEqual(allocations[0].source, "direct")
+        self.assertEqual(calc.distribute(task_id="leaf", node_id="leaf", total_revenue=0), ())
+
+    def test_distribute_many_matches_distribute(self) -> None:
+        nodes = [
+            RevenueNode(
+                id=f"n{i}",
+                creator_id=f"u{i % 3}",
+                created_at=self.now - dt.timedelta(days=i),
+                citation_count=i % 4,
+                propagation_rate=Decimal("0.4"),
+            )
+            for i in range(6)
+        ]
+        edges = [
+            RevenueEdge(from_node_id=f"n{i}", to_node_id=f"n{j}")
+            for i in range(6)
+            for j in range(i + 1, 6)
+        ]
+        calc = RevenueCalculator(graph=RevenueGraph(nodes=nodes, edges=edges), now=self.now)
+        inputs = [(f"t{k}", f"n{k % 6}", Decimal(k) + Decimal("0.37")) for k in range(40)]
+
+        expected = [calc.distribute(task_id=t, node_id=n, total_revenue=r) for t, n, r in inputs]
+        self.assertEqual(calc.distribute_many(inputs, max_workers=2), expected)
+        self.assertEqual(calc.distribute_many(inputs[:3]), expected[:3])
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
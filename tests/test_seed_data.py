@@ -1,7 +1,65 @@
+import os
+import tempfile
 import unittest
+import uuid
 from pathlib import Path
 
-from database.seed_data import generate_seed_from_feishu_csv, seed_to_sql
+from database.seed_data import generate_seed_from_feishu_csv, seed_to_database, seed_to_sql
+
+
+class _RecordingCopy:
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
+
+    def __enter__(self) -> "_RecordingCopy":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def write_row(self, row: tuple) -> None:
+        self._rows.append(row)
+
+
+class _RecordingConnection:
+    """Records the statements and COPY rows seed_to_database sends to a psycopg connection."""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.copied: dict[str, list] = {}
+
+    def transaction(self) -> "_RecordingConnection":
+        return self
+
+    def cursor(self) -> "_RecordingConnection":
+        return self
+
+    def __enter__(self) -> "_RecordingConnection":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str) -> None:
+        self.statements.append(sql)
+
+    def copy(self, sql: str) -> _RecordingCopy:
+        self.statements.append(sql)
+        return _RecordingCopy(self.copied.setdefault(sql.split()[1], []))
+
+
+def _two_task_seed():
+    content = "\n".join(
+        [
+            "任务名称,任务执行人,任务管理人,父记录",
+            "父任务,A,B,",
+            "子任务,A,,父任务",
+        ]
+    )
+    with tempfile.TemporaryDirectory() as td:
+        p = Path(td) / "x.csv"
+        p.write_text(content, encoding="utf-8")
+        return generate_seed_from_feishu_csv(p)
 
 
 class TestSeedData(unittest.TestCase):
@@ -14,3 +72,89 @@ class TestSeedData(unittest.TestCase):
         self.assertIn("INSERT INTO revenue_distributions", sql)
         self.assertIn("ON CONFLICT ON CONSTRAINT citations_unique_edge DO NOTHING", sql)
 
+    def test_seed_to_database_copies_through_staging_tables(self) -> None:
+        seed = _two_task_seed()
+        conn = _RecordingConnection()
+        seed_to_database(seed, conn)
+
+        self.assertEqual(len(conn.copied["_seed_users"]), len(seed.users))
+        self.assertEqual(len(conn.copied["_seed_nodes"]), len(seed.nodes))
+        self.assertEqual(len(conn.copied["_seed_citations"]), len(seed.citations))
+        self.assertEqual(len(conn.copied["_seed_revenue_distributions"]), len(seed.revenue_distributions))
+        self.assertEqual(
+            conn.statements,
+            [
+                "CREATE TEMP TABLE _seed_users ON COMMIT DROP AS SELECT id, username, reputation_score,"
+                " contribution_score, level, violation_count, created_at FROM users WITH NO DATA",
+                "COPY _seed_users (id, username, reputation_score, contribution_score, level, violation_count,"
+                " created_at) FROM STDIN",
+                "INSERT INTO users (id, username, reputation_score, contribution_score, level, violation_count,"
+                " created_at) SELECT id, username, reputation_score, contribution_score, level, violation_count,"
+                " COALESCE(created_at, now()) FROM _seed_users ON CONFLICT (username) DO NOTHING",
+                "DROP TABLE _seed_users",
+                "CREATE TEMP TABLE _seed_nodes ON COMMIT DROP AS SELECT id, title, type, creator_id, created_at,"
+                " api_call_count, citation_count, source, source_ref FROM nodes WITH NO DATA",
+                "COPY _seed_nodes (id, title, type, creator_id, created_at, api_call_count, citation_count,"
+                " source, source_ref) FROM STDIN",
+                "INSERT INTO nodes (id, title, type, creator_id, created_at, api_call_count, citation_count,"
+                " source, source_ref) SELECT id, title, type, creator_id, COALESCE(created_at, now()),"
+                " api_call_count, citation_count, source, source_ref FROM _seed_nodes ON CONFLICT (id) DO NOTHING",
+                "DROP TABLE _seed_nodes",
+                "CREATE TEMP TABLE _seed_citations ON COMMIT DROP AS SELECT id, from_node_id, to_node_id, weight,"
+                " created_at FROM citations WITH NO DATA",
+                "COPY _seed_citations (id, from_node_id, to_node_id, weight, created_at) FROM STDIN",
+                "INSERT INTO citations (id, from_node_id, to_node_id, weight, created_at) SELECT id, from_node_id,"
+                " to_node_id, weight, COALESCE(created_at, now()) FROM _seed_citations"
+                " ON CONFLICT ON CONSTRAINT citations_unique_edge DO NOTHING",
+                "DROP TABLE _seed_citations",
+                "CREATE TEMP TABLE _seed_revenue_distributions ON COMMIT DROP AS SELECT id, task_id, node_id,"
+                " user_id, amount, source, propagation_level, created_at FROM revenue_distributions WITH NO DATA",
+                "COPY _seed_revenue_distributions (id, task_id, node_id, user_id, amount, source,"
+                " propagation_level, created_at) FROM STDIN",
+                "INSERT INTO revenue_distributions (id, task_id, node_id, user_id, amount, source,"
+                " propagation_level, created_at) SELECT id, task_id, node_id, user_id, amount, source,"
+                " propagation_level, COALESCE(created_at, now()) FROM _seed_revenue_distributions"
+                " ON CONFLICT (id) DO NOTHING",
+                "DROP TABLE _seed_revenue_distributions",
+            ],
+        )
+
+
+@unittest.skipUnless(os.environ.get("SEED_TEST_DSN"), "SEED_TEST_DSN not set")
+class TestSeedToPostgres(unittest.TestCase):
+    """Loads the seed into a scratch schema of the database named by SEED_TEST_DSN."""
+
+    def setUp(self) -> None:
+        try:
+            import psycopg
+        except ModuleNotFoundError:
+            self.skipTest("psycopg not installed")
+        self.conn = psycopg.connect(os.environ["SEED_TEST_DSN"], autocommit=True)
+        self.addCleanup(self.conn.close)
+        self.schema = f"seed_test_{uuid.uuid4().hex[:12]}"
+        self.conn.execute(f"CREATE SCHEMA {self.schema}")
+        self.addCleanup(self.conn.execute, f"DROP SCHEMA {self.schema} CASCADE")
+        self.conn.execute(f"SET search_path TO {self.schema}, public")
+        schema_sql = Path(__file__).resolve().parents[1] / "database" / "schema.sql"
+        self.conn.execute(schema_sql.read_text(encoding="utf-8"))
+
+    def _counts(self) -> tuple:
+        tables = ("users", "nodes", "citations", "revenue_distributions")
+        return tuple(self.conn.execute(f"SELECT count(*) FROM {t}").fetchone()[0] for t in tables)
+
+    def test_seed_to_database_merges_and_is_idempotent(self) -> None:
+        seed = _two_task_seed()
+        seed_to_database(seed, self.conn)
+        expected = (len(seed.users), len(seed.nodes), len(seed.citations), len(seed.revenue_distributions))
+        self.assertEqual(self._counts(), expected)
+
+        seed_to_database(seed, self.conn)
+        self.assertEqual(self._counts(), expected)
+
+    def test_seed_to_database_twice_in_one_transaction(self) -> None:
+        seed = _two_task_seed()
+        with self.conn.transaction():
+            seed_to_database(seed, self.conn)
+            seed_to_database(seed, self.conn)
+        expected = (len(seed.users), len(seed.nodes), len(seed.citations), len(seed.revenue_distributions))
+        self.assertEqual(self._counts(), expected)
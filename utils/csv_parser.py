@@ -4,12 +4,22 @@ import argparse
 import csv
 import dataclasses
 import datetime as dt
-import json
+import functools
 import re
-from collections import defaultdict
+import sys
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Iterable
 
+try:
+    from utils.json_io import dump_json, dumps_json
+except ModuleNotFoundError:  # pragma: no cover
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from utils.json_io import dump_json, dumps_json
+
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep per-instance __dict__.
+_SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 _DEFAULT_PARENT_COLUMNS = ("父记录", "父记录 副本")
 _DEFAULT_TITLE_COLUMN = "任务名称"
@@ -19,13 +29,22 @@ _DEFAULT_DESCRIPTION_COLUMN = "任务详细描述"
 _DEFAULT_CREATED_DATE_COLUMN = "创建日期"
 _DEFAULT_DEADLINE_COLUMN = "截止日期"
 
+_MULTIVALUE_SEPARATOR_RE = re.compile(r"[,\uFF0C;\uFF1B\n]+")
+_READ_BUFFER_SIZE = 1 << 20  # read-ahead for the binary layer under the text decoder
 
-@dataclasses.dataclass(frozen=True)
+# Cells exported for empty spreadsheet values, and the non-numeric spellings of a true 是否是API flag.
+_NULL_CELL_VALUES = frozenset(("", "nan", "NaN", "None"))
+_TRUE_FLAG_VALUES = frozenset(("是", "true", "yes", "1"))
+# Names, parent titles and dates repeat across rows, so the pure cell helpers are memoized.
+_CELL_CACHE_SIZE = 8192
+
+
+@dataclasses.dataclass(frozen=True, **_SLOTS)
 class ParsedUser:
     username: str
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, **_SLOTS)
 class ParsedNode:
     title: str
     node_type: str
@@ -41,7 +60,7 @@ class ParsedNode:
     api_call_count: int = 0
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, **_SLOTS)
 class ParsedCitation:
     from_title: str
     to_title: str
@@ -50,7 +69,7 @@ class ParsedCitation:
     weight: float = 1.0
 
 
-@dataclasses.dataclass(frozen=True)
+@dataclasses.dataclass(frozen=True, **_SLOTS)
 class ParseWarning:
     code: str
     message: str
@@ -65,10 +84,13 @@ class ParsedGraph:
     warnings: tuple[ParseWarning, ...] = ()
 
 
+@functools.lru_cache(maxsize=_CELL_CACHE_SIZE)
 def _normalize_text(value: str | None) -> str:
     if value is None:
         return ""
-    return re.sub(r"\s+", " ", value.replace("\u3000", " ")).strip()
+    # str.split() splits on exactly the characters regex \s matches (U+3000 included),
+    # so this collapses whitespace runs and trims without entering the regex engine.
+    return " ".join(value.split())
 
 
 def _split_multivalue(value: str | None) -> tuple[str, ...]:
@@ -76,17 +98,29 @@ def _split_multivalue(value: str | None) -> tuple[str, ...]:
     if not text:
         return ()
     parts: list[str] = []
-    for token in re.split(r"[,\uFF0C;\uFF1B\n]+", text):
-        token = _normalize_text(token)
+    for token in _MULTIVALUE_SEPARATOR_RE.split(text):
+        token = token.strip()  # text is already normalized; only edge spaces remain
         if token:
-            parts.append(token)
+            # Usernames and parent titles recur across cells; share one string object per value.
+            parts.append(sys.intern(token))
     return tuple(parts)
 
 
+@functools.lru_cache(maxsize=_CELL_CACHE_SIZE)
 def _parse_date(value: str | None) -> dt.date | None:
     text = _normalize_text(value)
     if not text:
         return None
+    # Fast path for zero-padded YYYY?MM?DD, the shape Feishu exports; anything else
+    # (unpadded months/days, non-ASCII digits) falls through to strptime.
+    if len(text) == 10 and text[4] in "/-." and text[7] == text[4]:
+        year, month, day = text[0:4], text[5:7], text[8:10]
+        digits = year + month + day
+        if digits.isascii() and digits.isdigit():
+            try:
+                return dt.date(int(year), int(month), int(day))
+            except ValueError:
+                return None
     for fmt in ("%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d"):
         try:
             return dt.datetime.strptime(text, fmt).date()
@@ -95,6 +129,20 @@ def _parse_date(value: str | None) -> dt.date | None:
     return None
 
 
+# ParsedGraph is immutable, so a cached graph can be handed to every caller as-is.
+# One entry per (file, options), holding the (mtime_ns, size) it was parsed from; a changed
+# file replaces its entry, and the least recently used entries beyond the bound are dropped.
+_PARSE_CACHE_SIZE = 32
+_PARSE_CACHE: OrderedDict[tuple[Any, ...], tuple[tuple[int, int], ParsedGraph]] = OrderedDict()
+
+
+def _cell(row: list[str], index: int | None) -> str:
+    """Return the cell at index, or "" when the column is absent or the row is short."""
+    if index is None or index >= len(row):
+        return ""
+    return row[index]
+
+
 def parse_feishu_tasks_csv(
     csv_path: str | Path,
     *,
@@ -107,16 +155,42 @@ def parse_feishu_tasks_csv(
 
     The CSV is expected to contain Chinese headers (e.g. 任务名称, 父记录).
     Parent relations are converted into directed citations: child -> parent.
+
+    Results are cached per process, keyed on the file's path, mtime and size plus the
+    parse options; call clear_parse_cache() after rewriting a file in place.
     """
     csv_path = Path(csv_path)
+    parent_columns = tuple(parent_columns)
+    stat = csv_path.stat()
+    file_version = (stat.st_mtime_ns, stat.st_size)
+    cache_key = (str(csv_path.resolve()), source, parent_columns, create_missing_parents)
+    cached = _PARSE_CACHE.get(cache_key)
+    if cached is not None and cached[0] == file_version:
+        _PARSE_CACHE.move_to_end(cache_key)
+        return cached[1]
+
     warnings: list[ParseWarning] = []
 
-    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        if reader.fieldnames is None:
+    title_counts: dict[str, int] = {}
+    nodes_by_key: dict[str, ParsedNode] = {}
+    nodes_by_title: dict[str, list[str]] = {}
+    usernames: set[str] = set()
+
+    def allocate_key_for_title(title: str) -> str:
+        normalized = _normalize_text(title)
+        suffix = title_counts.get(normalized, 0) + 1
+        title_counts[normalized] = suffix
+        if suffix == 1:
+            return normalized
+        return f"{normalized}#{suffix}"
+
+    with csv_path.open("r", buffering=_READ_BUFFER_SIZE, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
             raise ValueError("CSV has no header row")
 
-        fieldnames = tuple(_normalize_text(name) for name in reader.fieldnames if name is not None)
+        fieldnames = tuple(_normalize_text(name) for name in header)
         if _DEFAULT_TITLE_COLUMN not in fieldnames:
             raise ValueError(f"CSV missing required column: {_DEFAULT_TITLE_COLUMN}")
 
@@ -129,88 +203,87 @@ def parse_feishu_tasks_csv(
                 )
             )
 
-        raw_rows: list[dict[str, str]] = []
-        for row in reader:
-            normalized_row: dict[str, str] = {}
-            for key, value in row.items():
-                if key is None:
-                    continue
-                normalized_row[_normalize_text(key)] = "" if value is None else value
-            raw_rows.append(normalized_row)
-
-    title_counts: dict[str, int] = defaultdict(int)
-    nodes_by_key: dict[str, ParsedNode] = {}
-    nodes_by_title: dict[str, list[str]] = defaultdict(list)
-    usernames: set[str] = set()
-
-    def allocate_key_for_title(title: str) -> str:
-        normalized = _normalize_text(title)
-        title_counts[normalized] += 1
-        suffix = title_counts[normalized]
-        if suffix == 1:
-            return normalized
-        return f"{normalized}#{suffix}"
+        # Cells are read by position; for repeated header names the last column wins.
+        column_index = {name: i for i, name in enumerate(fieldnames)}
+        title_idx = column_index[_DEFAULT_TITLE_COLUMN]
+        executors_idx = column_index.get(_DEFAULT_EXECUTORS_COLUMN)
+        managers_idx = column_index.get(_DEFAULT_MANAGERS_COLUMN)
+        description_idx = column_index.get(_DEFAULT_DESCRIPTION_COLUMN)
+        created_date_idx = column_index.get(_DEFAULT_CREATED_DATE_COLUMN)
+        deadline_idx = column_index.get(_DEFAULT_DEADLINE_COLUMN)
+        is_api_idx = column_index.get("是否是API")
+        api_count_idx = column_index.get("API调用次数")
+        parent_indices = tuple(column_index[col] for col in normalized_parent_columns)
+
+        # Rows are turned into nodes as they are read; blank lines carry no record.
+        for i, row in enumerate((row for row in reader if row), start=1):
+            title = _normalize_text(_cell(row, title_idx))
+            if not title:
+                warnings.append(
+                    ParseWarning(code="missing_title", message="Row missing 任务名称", row_index=i)
+                )
+                continue
 
-    for i, row in enumerate(raw_rows, start=1):
-        title = _normalize_text(row.get(_DEFAULT_TITLE_COLUMN))
-        if not title:
-            warnings.append(
-                ParseWarning(code="missing_title", message="Row missing 任务名称", row_index=i)
+            source_ref = f"row:{i}"
+            node_key = allocate_key_for_title(title)
+            created_date = _parse_date(_cell(row, created_date_idx))
+            deadline_date = _parse_date(_cell(row, deadline_idx))
+            description = _normalize_text(_cell(row, description_idx)) or None
+            executors = _split_multivalue(_cell(row, executors_idx))
+            managers = _split_multivalue(_cell(row, managers_idx))
+
+            parent_titles: list[str] = []
+            for parent_idx in parent_indices:
+                for parent_title in _split_multivalue(_cell(row, parent_idx)):
+                    if parent_title and parent_title != title:
+                        parent_titles.append(parent_title)
+
+            # 解析API相关字段
+            is_api = False
+            api_call_count = 0
+
+            is_api_str = _normalize_text(_cell(row, is_api_idx))
+            if is_api_str not in _NULL_CELL_VALUES:
+                if is_api_str.lower() in _TRUE_FLAG_VALUES:
+                    is_api = True
+                else:
+                    try:
+                        is_api = bool(float(is_api_str))
+                    except ValueError:
+                        pass
+
+            api_count_str = _normalize_text(_cell(row, api_count_idx))
+            if api_count_str not in _NULL_CELL_VALUES:
+                try:
+                    api_call_count = int(float(api_count_str))
+                except ValueError:
+                    pass
+
+            parents = tuple(dict.fromkeys(parent_titles))  # dedupe, keep column/cell order
+            if executors or managers:
+                usernames.update(executors)
+                usernames.update(managers)
+
+            node = ParsedNode(
+                title=title,
+                node_type="task",
+                source=source,
+                source_ref=source_ref,
+                created_date=created_date,
+                deadline_date=deadline_date,
+                description=description,
+                executors=executors,
+                managers=managers,
+                parents=parents,
+                is_api=is_api,
+                api_call_count=api_call_count,
             )
-            continue
-
-        source_ref = f"row:{i}"
-        node_key = allocate_key_for_title(title)
-        created_date = _parse_date(row.get(_DEFAULT_CREATED_DATE_COLUMN))
-        deadline_date = _parse_date(row.get(_DEFAULT_DEADLINE_COLUMN))
-        description = _normalize_text(row.get(_DEFAULT_DESCRIPTION_COLUMN)) or None
-        executors = _split_multivalue(row.get(_DEFAULT_EXECUTORS_COLUMN))
-        managers = _split_multivalue(row.get(_DEFAULT_MANAGERS_COLUMN))
-
-        parent_titles: list[str] = []
-        for parent_col in normalized_parent_columns:
-            for parent_title in _split_multivalue(row.get(parent_col)):
-                if parent_title and parent_title != title:
-                    parent_titles.append(parent_title)
-
-        # 解析API相关字段
-        is_api = False
-        api_call_count = 0
-
-        is_api_str = _normalize_text(row.get("是否是API"))
-        if is_api_str and is_api_str not in ("", "nan", "NaN", "None"):
-            try:
-                is_api = bool(float(is_api_str))
-            except ValueError:
-                is_api = is_api_str.lower() in ("是", "true", "yes", "1")
-
-        api_count_str = _normalize_text(row.get("API调用次数"))
-        if api_count_str and api_count_str not in ("", "nan", "NaN", "None"):
-            try:
-                api_call_count = int(float(api_count_str))
-            except ValueError:
-                pass
-
-        parent_titles = sorted(set(parent_titles))
-        usernames.update(executors)
-        usernames.update(managers)
-
-        node = ParsedNode(
-            title=title,
-            node_type="task",
-            source=source,
-            source_ref=source_ref,
-            created_date=created_date,
-            deadline_date=deadline_date,
-            description=description,
-            executors=executors,
-            managers=managers,
-            parents=tuple(parent_titles),
-            is_api=is_api,
-            api_call_count=api_call_count,
-        )
-        nodes_by_key[node_key] = node
-        nodes_by_title[title].append(node_key)
+            nodes_by_key[node_key] = node
+            title_keys = nodes_by_title.get(title)
+            if title_keys is None:
+                nodes_by_title[title] = [node_key]
+            else:
+                title_keys.append(node_key)
 
     if create_missing_parents:
         referenced_parents = set()
@@ -228,7 +301,7 @@ def parse_feishu_tasks_csv(
                 source_ref="synthetic:missing_parent",
                 parents=(),
             )
-            nodes_by_title[parent_title].append(node_key)
+            nodes_by_title[parent_title] = [node_key]
             warnings.append(
                 ParseWarning(
                     code="missing_parent_node_created",
@@ -266,33 +339,66 @@ def parse_feishu_tasks_csv(
                 )
             )
 
-    users = tuple(sorted((ParsedUser(username=u) for u in usernames), key=lambda x: x.username))
+    users = tuple(ParsedUser(username=u) for u in sorted(usernames))
     nodes = tuple(nodes_by_key.values())
 
-    return ParsedGraph(
+    graph = ParsedGraph(
         users=users,
         nodes=nodes,
         citations=tuple(citations),
         warnings=tuple(warnings),
     )
+    _PARSE_CACHE[cache_key] = (file_version, graph)
+    _PARSE_CACHE.move_to_end(cache_key)
+    if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+        _PARSE_CACHE.popitem(last=False)
+    return graph
 
 
-def graph_to_jsonable(graph: ParsedGraph) -> dict[str, Any]:
-    def date_to_str(value: dt.date | None) -> str | None:
-        return value.isoformat() if value is not None else None
+def clear_parse_cache() -> None:
+    """Drop all graphs cached by parse_feishu_tasks_csv."""
+    _PARSE_CACHE.clear()
+
+
+def _date_to_str(value: dt.date | None) -> str | None:
+    return value.isoformat() if value is not None else None
 
+
+def _node_to_jsonable(n: ParsedNode) -> dict[str, Any]:
     return {
-        "users": [dataclasses.asdict(u) for u in graph.users],
-        "nodes": [
+        "title": n.title,
+        "node_type": n.node_type,
+        "source": n.source,
+        "source_ref": n.source_ref,
+        "created_date": _date_to_str(n.created_date),
+        "deadline_date": _date_to_str(n.deadline_date),
+        "description": n.description,
+        "executors": list(n.executors),
+        "managers": list(n.managers),
+        "parents": list(n.parents),
+        "is_api": n.is_api,
+        "api_call_count": n.api_call_count,
+    }
+
+
+def graph_to_jsonable(graph: ParsedGraph) -> dict[str, Any]:
+    # Fields are all scalars or tuples of str, so plain dicts replace dataclasses.asdict's deep copy.
+    return {
+        "users": [{"username": u.username} for u in graph.users],
+        "nodes": [_node_to_jsonable(n) for n in graph.nodes],
+        "citations": [
             {
-                **dataclasses.asdict(n),
-                "created_date": date_to_str(n.created_date),
-                "deadline_date": date_to_str(n.deadline_date),
+                "from_title": c.from_title,
+                "to_title": c.to_title,
+                "from_source_ref": c.from_source_ref,
+                "to_source_ref": c.to_source_ref,
+                "weight": c.weight,
             }
-            for n in graph.nodes
+            for c in graph.citations
+        ],
+        "warnings": [
+            {"code": w.code, "message": w.message, "row_index": w.row_index} for w in graph.warnings
         ],
-        "citations": [dataclasses.asdict(c) for c in graph.citations],
-        "warnings": [dataclasses.asdict(w) for w in graph.warnings],
     }
 
 
@@ -307,11 +413,10 @@ def main() -> int:
         args.input, create_missing_parents=not args.no_create_missing_parents
     )
     payload = graph_to_jsonable(graph)
-    content = json.dumps(payload, ensure_ascii=False, indent=2)
     if args.output:
-        Path(args.output).write_text(content, encoding="utf-8")
+        dump_json(payload, args.output)
     else:
-        print(content)
+        print(dumps_json(payload).decode("utf-8"))
     return 0
 
 
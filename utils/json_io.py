@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _has_float_spelled_differently(data: Any) -> bool:
+    """
+    True if data holds a float orjson would write differently from the stdlib encoder.
+
+    The stdlib writes floats outside [1e-4, 1e16) in exponent form (1e-05, 1e+16) and
+    non-finite ones as NaN/Infinity; orjson writes 0.00001, 1e16 and null instead.
+    """
+    stack = [data]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        obj = pop()
+        if isinstance(obj, float):
+            if obj and not 1e-4 <= abs(obj) < 1e16:
+                return True
+        elif isinstance(obj, dict):
+            extend(obj.keys())
+            extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            extend(obj)
+    return False
+
+
+def dumps_json(data: Any, *, default: Callable[[Any], Any] | None = None) -> bytes:
+    """
+    Encode data as 2-space indented UTF-8 JSON (non-ASCII text kept as-is).
+
+    Uses orjson when it is installed and the stdlib encoder otherwise; both produce the
+    same bytes. Datetimes go through `default` as with the stdlib, and payloads orjson
+    would spell differently (exponent-form or non-finite floats) or rejects (e.g.
+    integers beyond 64 bits) are encoded by the stdlib.
+    """
+    if orjson is not None and not _has_float_spelled_differently(data):
+        try:
+            return orjson.dumps(
+                data,
+                default=default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, indent=2, default=default).encode("utf-8")
+
+
+def dump_json(data: Any, path: str | Path, *, default: Callable[[Any], Any] | None = None) -> None:
+    Path(path).write_bytes(dumps_json(data, default=default))